@@ -37,17 +37,21 @@ class Registry:
         async def echo(params):
             return params
 
+        registry.freeze()  # at server startup
         result = await registry.dispatch("echo", {"msg": "hi"})
     """
 
     def __init__(self) -> None:
         self._handlers: dict[str, HandlerFn] = {}
+        self._frozen = False
 
     # -- Registration --------------------------------------------------
     def handler(self, method: str) -> Callable[[HandlerFn], HandlerFn]:
         """Decorator that registers *fn* under *method*."""
 
         def decorator(fn: HandlerFn) -> HandlerFn:
+            if self._frozen:
+                raise RuntimeError(f"registry is frozen; cannot register {method!r}")
             if method in self._handlers:
                 log.warning("overwriting handler for %r", method)
             self._handlers[method] = fn
@@ -56,6 +60,16 @@ class Registry:
 
         return decorator
 
+    def freeze(self) -> None:
+        """Close the method table once startup is complete.
+
+        After this, registration raises ``RuntimeError``, so no handler can
+        be added or replaced while requests are being served.  Dispatch is
+        unaffected.  Safe to call more than once.
+        """
+        self._frozen = True
+        log.debug("registry frozen with %d methods", len(self._handlers))
+
     # -- Dispatch ------------------------------------------------------
     async def dispatch(self, method: str, params: dict[str, Any]) -> Any:
         """Call the handler for *method* and return its result.
@@ -72,5 +86,9 @@ class Registry:
     def methods(self) -> list[str]:
         return list(self._handlers.keys())
 
+    @property
+    def frozen(self) -> bool:
+        return self._frozen
+
     def is_registered(self, method: str) -> bool:
         return method in self._handlers
@@ -52,10 +52,15 @@ async def generate(params: dict) -> str:
 
 
 async def generate_stream(params: dict, ctx: StreamContext) -> None:
-    """Streaming handler: emit token events with simulated delay."""
+    """Streaming handler: emit token events with simulated delay.
+
+    Pacing runs against absolute deadlines so per-token overhead does not
+    accumulate as drift; ``delay <= 0`` never sleeps at all.
+    """
     prompt = params.get("prompt", "")
     tokens = params.get("tokens", 5)
     delay = params.get("delay", 0.3)
+    deadline = anyio.current_time()
 
     for i in range(tokens):
         if ctx.cancelled:
@@ -68,7 +73,11 @@ async def generate_stream(params: dict, ctx: StreamContext) -> None:
                 "prompt": prompt,
             }
         )
-        await anyio.sleep(delay)
+        if delay > 0:
+            deadline += delay
+            wait = deadline - anyio.current_time()
+            if wait > 0:
+                await anyio.sleep(wait)
 
     if not ctx.cancelled:
         await ctx.emit({"type": "done", "total": tokens})
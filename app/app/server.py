@@ -1,29 +1,33 @@
-"""Application compartment — Starlette ASGI server.
+"""Application compartment — bare ASGI server.
 
 Single ``/rpc`` POST endpoint that handles both unary and streaming
-JSON-RPC 2.0 requests.
+JSON-RPC 2.0 requests.  The unary path speaks ASGI directly, so no
+``Request``/``Response`` objects are built per call.  Starlette supplies
+only helpers: ``StreamingResponse`` for SSE, canned ``PlainTextResponse``
+objects for the 404/405/413 replies, and ``ClientDisconnect``.
 
-Run directly::
+Run directly (``uvicorn[standard]`` picks uvloop + httptools)::
 
     python -m app.server
 """
 
 from __future__ import annotations
 
-import json
 import logging
+from typing import Annotated, Any, Literal
 
+import msgspec
+import orjson
+from shared.codec import dumps
 from shared.jsonrpc import (
     INTERNAL_ERROR,
     INVALID_REQUEST,
     PARSE_ERROR,
-    JsonRpcRequest,
-    JsonRpcResponse,
+    new_request_id,
 )
-from starlette.applications import Starlette
-from starlette.requests import Request
-from starlette.responses import JSONResponse, StreamingResponse
-from starlette.routing import Route
+from starlette.requests import ClientDisconnect
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.dispatcher import MethodNotFoundError
 from app.handlers import (
@@ -35,58 +39,190 @@ from app.handlers import (
 
 log = logging.getLogger(__name__)
 
+# Decoding holds the event loop (and the GIL) for the whole body, so the
+# body size bounds how long one request can stall every other stream.
+MAX_BODY_SIZE = 16 * 1024 * 1024  # bytes
+
+
+class _WireRequest(msgspec.Struct):
+    """Inbound request as decoded off the wire.
+
+    ``msgspec`` parses and validates the body in a single C pass, so no
+    intermediate dict is built and no Python-level checks run.
+    """
+
+    jsonrpc: Literal["2.0"]
+    method: Annotated[str, msgspec.Meta(min_length=1)]
+    params: dict[str, Any] = {}
+    id: str | int | float | None = None
+
+
+_request_decoder = msgspec.json.Decoder(_WireRequest)
+
 
 # ── Helpers ──────────────────────────────────────────────────────────
 
 
-def _error_response(req_id: str | None, code: int, msg: str, status: int = 200) -> JSONResponse:
-    """Build a JSON-RPC error response."""
-    resp = JsonRpcResponse.fail(req_id, code, msg)
-    return JSONResponse(resp.to_dict(), status_code=status)
+_SSE_DATA = b"data: "
+_SSE_END = b"\n\n"
+_SSE_KEEPALIVE = b": keep-alive\n\n"  # comment frame, ignored by SSE parsers
+_SSE_CHUNK_BYTES = 16 * 1024  # flush a coalesced batch once it grows past this
+# Lifecycle frames only vary by stream id, which is hex and needs no escaping.
+_SSE_START = b'data: {"type":"stream_start","stream_id":"%s"}\n\n'
+_SSE_STOP = b'data: {"type":"stream_end","stream_id":"%s"}\n\n'
+
+_NOT_FOUND = PlainTextResponse("Not Found", status_code=404)
+_METHOD_NOT_ALLOWED = PlainTextResponse(
+    "Method Not Allowed", status_code=405, headers={"Allow": "POST"}
+)
+_PAYLOAD_TOO_LARGE = PlainTextResponse("Payload Too Large", status_code=413)
+
+
+def _success_response(req_id: str, result: Any) -> bytes:
+    """Build an encoded JSON-RPC result response.
+
+    Same shape as ``JsonRpcResponse.to_dict``, encoded straight to bytes
+    without the intermediate dataclass.
+    """
+    return dumps({"jsonrpc": "2.0", "id": req_id, "result": result})
+
+
+# Error envelopes are fixed apart from id and message, so they are
+# spliced into a byte template instead of going through a dict.
+_ERROR_TEMPLATE = b'{"jsonrpc":"2.0","id":%b,"error":{"code":%d,"message":%b}}'
+_NULL_ID = b'"null"'  # matches JsonRpcResponse.fail(None, ...)
+_PARSE_ERROR_BODY = _ERROR_TEMPLATE % (_NULL_ID, PARSE_ERROR, b'"Parse error"')
+
+
+def _error_response(req_id: str | None, code: int, msg: str) -> bytes:
+    """Build an encoded JSON-RPC error response."""
+    return _ERROR_TEMPLATE % (orjson.dumps(req_id) if req_id else _NULL_ID, code, orjson.dumps(msg))
+
+
+async def _read_body(receive: Receive) -> bytes | None:
+    """Collect the request body from ``http.request`` messages.
+
+    Returns None as soon as the body exceeds ``MAX_BODY_SIZE``.  Raises
+    ``ClientDisconnect`` if the client goes away before the body ends.
+    """
+    message = await receive()
+    if message["type"] != "http.request":
+        raise ClientDisconnect()
+    body = message.get("body", b"")
+    if not message.get("more_body", False):
+        return body if len(body) <= MAX_BODY_SIZE else None
+    chunks = [body]
+    size = len(body)
+    while message.get("more_body", False):
+        message = await receive()
+        if message["type"] != "http.request":
+            raise ClientDisconnect()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_SIZE:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _send_json(send: Send, body: bytes) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def _sse_frame(event: dict) -> bytes:
+    """Encode *event* as one SSE ``data:`` frame.
+
+    An event that cannot be encoded becomes an error event, so one bad
+    event does not tear down the rest of the stream.
+    """
+    try:
+        payload = dumps(event)
+    except (TypeError, ValueError) as exc:
+        log.warning("dropping unencodable stream event: %s", exc)
+        payload = orjson.dumps({"error": f"unencodable event: {exc}"})
+    return b"".join((_SSE_DATA, payload, _SSE_END))
 
 
 async def _sse_generator(method: str, params: dict, stream_id: str):
-    """Yield SSE-formatted lines from a streaming handler."""
+    """Yield SSE-formatted frames (as bytes) from a streaming handler."""
     handler = get_stream_handler(method)
     if handler is None:
-        yield f"data: {json.dumps({'error': 'no stream handler'})}\n\n"
+        yield _sse_frame({"error": "no stream handler"})
         return
 
-    # Emit the stream_id first so Engine can cancel later
-    yield f"data: {json.dumps({'type': 'stream_start', 'stream_id': stream_id})}\n\n"
+    sid = stream_id.encode("ascii")
 
-    async for event in stream_manager.run_stream(handler, params, stream_id=stream_id):
-        yield f"data: {json.dumps(event)}\n\n"
-
-    yield f"data: {json.dumps({'type': 'stream_end', 'stream_id': stream_id})}\n\n"
+    # Emit the stream_id first so Engine can cancel later
+    yield _SSE_START % sid
+
+    # Events that queued up while the last chunk was being sent go out
+    # together, in as few ASGI body messages as the size cap allows.
+    async for batch in stream_manager.run_stream(handler, params, stream_id=stream_id):
+        if not batch:
+            yield _SSE_KEEPALIVE
+            continue
+        frames: list[bytes] = []
+        size = 0
+        for event in batch:
+            frame = _sse_frame(event)
+            frames.append(frame)
+            size += len(frame)
+            if size >= _SSE_CHUNK_BYTES:
+                yield b"".join(frames)
+                frames.clear()
+                size = 0
+        if frames:
+            yield b"".join(frames)
+
+    yield _SSE_STOP % sid
 
 
 # ── RPC endpoint ─────────────────────────────────────────────────────
 
 
-async def rpc_endpoint(request: Request) -> JSONResponse | StreamingResponse:
-    """Handle a JSON-RPC 2.0 POST to ``/rpc``."""
-    req_id: str | None = None
-
-    try:
-        body = await request.body()
-        raw = json.loads(body)
-    except (json.JSONDecodeError, UnicodeDecodeError):
-        return _error_response(None, PARSE_ERROR, "Parse error")
+async def rpc_endpoint(body: bytes) -> bytes | StreamingResponse:
+    """Handle the body of a JSON-RPC 2.0 POST to ``/rpc``.
 
+    Returns the encoded response for unary calls, or an SSE
+    ``StreamingResponse`` for streaming methods.
+    """
     try:
-        rpc_req = JsonRpcRequest.from_dict(raw)
-        req_id = rpc_req.id
-    except ValueError as exc:
+        wire = _request_decoder.decode(body)
+    except msgspec.ValidationError as exc:
         return _error_response(None, INVALID_REQUEST, str(exc))
+    except msgspec.DecodeError:
+        return _PARSE_ERROR_BODY
 
-    log.info("rpc ← %s(id=%s)", rpc_req.method, req_id)
+    method, params = wire.method, wire.params
+    req_id = new_request_id() if wire.id is None else str(wire.id)
+
+    log.info("rpc ← %s(id=%s)", method, req_id)
 
     # ── Streaming path ───────────────────────────────────────────
-    if rpc_req.method in STREAMING_METHODS:
+    if method in STREAMING_METHODS:
         stream_id = stream_manager.new_stream_id()
         return StreamingResponse(
-            _sse_generator(rpc_req.method, rpc_req.params, stream_id),
+            _sse_generator(method, params, stream_id),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
@@ -96,24 +232,51 @@ async def rpc_endpoint(request: Request) -> JSONResponse | StreamingResponse:
 
     # ── Unary path ───────────────────────────────────────────────
     try:
-        result = await registry.dispatch(rpc_req.method, rpc_req.params)
-        resp = JsonRpcResponse.success(req_id, result)
-        return JSONResponse(resp.to_dict())
+        result = await registry.dispatch(method, params)
+        return _success_response(req_id, result)
     except MethodNotFoundError as exc:
         return _error_response(req_id, exc.code, str(exc))
     except Exception as exc:
-        log.exception("handler error for %s", rpc_req.method)
+        log.exception("handler error for %s", method)
         return _error_response(req_id, INTERNAL_ERROR, f"Internal error: {exc}")
 
 
-# ── App factory ──────────────────────────────────────────────────────
+# ── ASGI app ─────────────────────────────────────────────────────────
 
 
-def create_app() -> Starlette:
-    return Starlette(
-        debug=False,
-        routes=[Route("/rpc", rpc_endpoint, methods=["POST"])],
-    )
+async def rpc_app(scope: Scope, receive: Receive, send: Send) -> None:
+    """ASGI entrypoint — routes ``POST /rpc`` and answers lifespan events."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    if scope["path"] != "/rpc":
+        await _NOT_FOUND(scope, receive, send)
+        return
+    if scope["method"] != "POST":
+        await _METHOD_NOT_ALLOWED(scope, receive, send)
+        return
+
+    try:
+        body = await _read_body(receive)
+    except ClientDisconnect:
+        return  # nobody left to answer
+    if body is None:
+        await _PAYLOAD_TOO_LARGE(scope, receive, send)
+        return
+
+    reply = await rpc_endpoint(body)
+    if isinstance(reply, bytes):
+        await _send_json(send, reply)
+    else:
+        await reply(scope, receive, send)
+
+
+def create_app() -> ASGIApp:
+    # Handlers register at import time; the method table is fixed from here on.
+    registry.freeze()
+    return rpc_app
 
 
 app = create_app()
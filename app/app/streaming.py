@@ -3,35 +3,53 @@
 * ``StreamManager`` — in-memory registry of running streams.
 * ``StreamContext``  — passed into streaming handlers so they can emit
   events and check for cancellation.
+* ``MemoryChannelPool`` — free-list of memory channels reused across
+  streams.
 
 Every stream runs inside an ``anyio`` task group with a strict timeout
-and a bounded output buffer for back-pressure.
+and a bounded output buffer for back-pressure.  A consumer that stops
+reading stalls ``emit`` for at most ``send_timeout`` seconds before the
+stream is cancelled.  ``run_stream`` yields events in batches — whatever
+has queued up since the consumer last asked — and yields an empty batch
+when the stream is idle so the transport can ping the client.
 """
 
 from __future__ import annotations
 
 import logging
-import uuid
+import os
 from dataclasses import dataclass
 from typing import Any, AsyncIterator, Awaitable, Callable
 
 import anyio
 from anyio.abc import CancelScope
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 
 log = logging.getLogger(__name__)
 
 # Defaults
 DEFAULT_STREAM_TIMEOUT = 120.0  # seconds
 DEFAULT_BUFFER_SIZE = 64  # max queued events before back-pressure
+DEFAULT_POOL_SIZE = 32  # idle channels kept for reuse
+DEFAULT_SEND_TIMEOUT = 30.0  # max seconds an emit may wait on a full buffer
+DEFAULT_KEEPALIVE = 30.0  # idle seconds before run_stream yields an empty batch
+DEFAULT_MAX_BATCH = 16  # max events coalesced into one batch
+
+# End-of-stream marker.  Pooled channels are never closed, so the end of
+# a stream is signalled in-band instead.
+_EOS: Any = object()
 
 
 @dataclass(slots=True)
 class _StreamEntry:
-    """Internal bookkeeping for one active stream."""
+    """Internal bookkeeping for one active stream.
+
+    Entries leave ``StreamManager._streams`` the moment the handler
+    finishes, so presence in the table means the stream is live.
+    """
 
     stream_id: str
-    cancel_scope: CancelScope | None = None
-    done: bool = False
+    cancel_scope: CancelScope
 
 
 class StreamContext:
@@ -46,10 +64,12 @@ class StreamContext:
         stream_id: str,
         send: anyio.abc.ObjectSendStream,
         cancel_scope: CancelScope,
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
     ) -> None:
         self.stream_id = stream_id
         self._send = send
         self._cancel_scope = cancel_scope
+        self._send_timeout = send_timeout
 
     @property
     def cancelled(self) -> bool:
@@ -58,16 +78,81 @@ class StreamContext:
     async def emit(self, event: dict[str, Any]) -> None:
         """Push an event into the output buffer.
 
-        Blocks if the buffer is full (back-pressure).
+        Blocks if the buffer is full (back-pressure).  If the consumer
+        does not make room within ``send_timeout`` seconds, the stream
+        is cancelled and the event dropped.
         """
         if self.cancelled:
             return
-        await self._send.send(event)
+        try:
+            self._send.send_nowait(event)
+            return
+        except anyio.WouldBlock:
+            pass
+        try:
+            with anyio.fail_after(self._send_timeout):
+                await self._send.send(event)
+        except TimeoutError:
+            log.warning("stream %s consumer stalled, cancelling", self.stream_id)
+            self._cancel_scope.cancel()
 
 
 # Type alias for streaming handler
 StreamHandlerFn = Callable[[dict[str, Any], StreamContext], Awaitable[None]]
 
+_Channel = tuple[MemoryObjectSendStream[Any], MemoryObjectReceiveStream[Any]]
+
+
+def _drain(recv: MemoryObjectReceiveStream[Any]) -> int:
+    """Discard everything buffered in *recv*; return how many were dropped."""
+    dropped = 0
+    while True:
+        try:
+            recv.receive_nowait()
+        except anyio.WouldBlock:
+            return dropped
+        dropped += 1
+
+
+class MemoryChannelPool:
+    """Reusable ``(send, recv)`` memory channel pairs.
+
+    Saves allocating a fresh channel per stream.  Up to *size* idle pairs
+    are kept (pre-allocated up front); beyond that, pairs are created on
+    demand and closed on release.
+    """
+
+    def __init__(self, buffer_size: int, size: int) -> None:
+        # Streams end with an in-band marker that must fit after a drain.
+        if buffer_size < 1:
+            raise ValueError(f"buffer_size must be at least 1, got {buffer_size}")
+        self._buffer_size = buffer_size
+        self._size = size
+        self._free: list[_Channel] = [self._create() for _ in range(size)]
+
+    def _create(self) -> _Channel:
+        return anyio.create_memory_object_stream[Any](max_buffer_size=self._buffer_size)
+
+    def acquire(self) -> _Channel:
+        if self._free:
+            return self._free.pop()
+        return self._create()
+
+    def release(
+        self, send: MemoryObjectSendStream[Any], recv: MemoryObjectReceiveStream[Any]
+    ) -> None:
+        """Drain whatever an aborted stream left behind and return the pair."""
+        _drain(recv)
+        if len(self._free) < self._size:
+            self._free.append((send, recv))
+        else:
+            send.close()
+            recv.close()
+
+    @property
+    def idle(self) -> int:
+        return len(self._free)
+
 
 class StreamManager:
     """Owns all active streams.  Engine cancels via ``cancel_stream``."""
@@ -76,66 +161,115 @@ class StreamManager:
         self,
         timeout: float = DEFAULT_STREAM_TIMEOUT,
         buffer_size: int = DEFAULT_BUFFER_SIZE,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+        keepalive: float | None = DEFAULT_KEEPALIVE,
+        max_batch: int = DEFAULT_MAX_BATCH,
     ) -> None:
         self._timeout = timeout
         self._buffer_size = buffer_size
+        self._send_timeout = send_timeout
+        self._keepalive = keepalive
+        self._max_batch = max_batch
+        self._channels = MemoryChannelPool(buffer_size, pool_size)
         self._streams: dict[str, _StreamEntry] = {}
 
     # -- Public API ----------------------------------------------------
 
     def new_stream_id(self) -> str:
-        return uuid.uuid4().hex
+        # 128 random bits, no less than uuid4 gave: knowing the id is all a
+        # client needs to cancel a stream, so it must not be guessable.
+        return os.urandom(16).hex()
 
     async def run_stream(
         self,
         handler: StreamHandlerFn,
         params: dict[str, Any],
         stream_id: str | None = None,
-    ) -> AsyncIterator[dict[str, Any]]:
-        """Run *handler* in a task group and yield events as they arrive.
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Run *handler* in a task group and yield batches of events.
+
+        Each batch holds up to ``max_batch`` events that were already
+        queued — the wait is only for the first one.  If nothing arrives
+        for ``keepalive`` seconds an empty batch is yielded.
 
         The returned async iterator is what the server turns into SSE.
         """
         stream_id = stream_id or self.new_stream_id()
-        send, recv = anyio.create_memory_object_stream[dict[str, Any]](
-            max_buffer_size=self._buffer_size,
-        )
-        entry = _StreamEntry(stream_id=stream_id)
-        self._streams[stream_id] = entry
+        send, recv = self._channels.acquire()
+        scope = anyio.move_on_after(self._timeout)
+        self._streams[stream_id] = _StreamEntry(stream_id, scope)
 
         async def _run() -> None:
             try:
-                with anyio.move_on_after(self._timeout) as scope:
-                    entry.cancel_scope = scope
-                    ctx = StreamContext(stream_id, send, scope)
+                with scope:
+                    ctx = StreamContext(stream_id, send, scope, self._send_timeout)
                     await handler(params, ctx)
             except Exception:
                 log.exception("stream %s handler error", stream_id)
             finally:
-                await send.aclose()
-                entry.done = True
-
-        async with anyio.create_task_group() as tg:
-            tg.start_soon(_run)
-
-            async with recv:
-                async for event in recv:
-                    yield event
+                self._streams.pop(stream_id, None)
+                # Fence the context: a leaked ``ctx`` must not emit into
+                # the channel once it is back in the pool.
+                scope.cancel()
+            # Not reached when the consumer went away and the task group
+            # cancelled us — nobody is left to read the marker.
+            try:
+                send.send_nowait(_EOS)
+                return
+            except anyio.WouldBlock:
+                pass
+            # Bounded like ``emit``: a stalled consumer must not pin this
+            # task and its buffered events.  Past the timeout the backlog
+            # is dropped; buffers hold at least one item (enforced by the
+            # pool), so that leaves room for the marker.
+            try:
+                with anyio.fail_after(self._send_timeout):
+                    await send.send(_EOS)
+            except TimeoutError:
+                dropped = _drain(recv)
+                log.warning("stream %s consumer stalled, dropped %d events", stream_id, dropped)
+                send.send_nowait(_EOS)
+
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(_run)
+
+                while True:
+                    try:
+                        batch = [recv.receive_nowait()]
+                    except anyio.WouldBlock:
+                        batch = []
+                        with anyio.move_on_after(self._keepalive):
+                            batch.append(await recv.receive())
+                    while len(batch) < self._max_batch:
+                        try:
+                            batch.append(recv.receive_nowait())
+                        except anyio.WouldBlock:
+                            break
+                    # Nothing is sent after the marker, so it can only be last.
+                    if batch and batch[-1] is _EOS:
+                        batch.pop()
+                        if batch:
+                            yield batch
+                        break
+                    yield batch
+        finally:
+            # Backstop: ``_run`` never starts if we are cancelled first.
+            self._streams.pop(stream_id, None)
+            self._channels.release(send, recv)
 
-        self._streams.pop(stream_id, None)
         log.debug("stream %s finished", stream_id)
 
     def cancel_stream(self, stream_id: str) -> bool:
         """Cancel a running stream.  Returns True if found."""
         entry = self._streams.get(stream_id)
-        if entry is None or entry.done:
+        if entry is None:
             return False
-        if entry.cancel_scope is not None:
-            entry.cancel_scope.cancel()
-            log.info("cancelled stream %s", stream_id)
-            return True
-        return False
+        entry.cancel_scope.cancel()
+        log.info("cancelled stream %s", stream_id)
+        return True
 
     @property
     def active_streams(self) -> list[str]:
-        return [sid for sid, e in self._streams.items() if not e.done]
+        return [e.stream_id for e in self._streams.values()]
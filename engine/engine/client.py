@@ -4,7 +4,9 @@
 * ``stream(method, params)`` → async iterator of SSE events
 * ``cancel_stream(id)``      → tell Application to cancel a stream
 
-Uses ``httpx.AsyncClient`` with connection pooling.
+Uses one ``httpx.AsyncClient`` with connection pooling; HTTP/2 is
+negotiated where the server offers it, so concurrent calls and streams
+multiplex over a single connection.
 **Never** imports from ``app/``.
 
 Run directly for a quick demo::
@@ -14,17 +16,32 @@ Run directly for a quick demo::
 
 from __future__ import annotations
 
-import json
 import logging
 from typing import Any, AsyncIterator
 
+import anyio
 import httpx
+from shared.codec import dumps, loads
 from shared.jsonrpc import JsonRpcError, JsonRpcRequest
 
-from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential, retry_if_exception_type
-
 log = logging.getLogger(__name__)
 
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Connection-level retry: exponential backoff 0.5s, 1s, 2s, ... capped at 10s
+_RETRY_ON = (httpx.NetworkError, httpx.TimeoutException)
+_RETRY_BASE_DELAY = 0.5
+_RETRY_MAX_DELAY = 10.0
+
+
+def _sse_data(frame: bytes) -> bytes | None:
+    """Return the ``data`` payload of one SSE frame, or None if it is blank."""
+    if frame.startswith(b"data:") and b"\n" not in frame:
+        data = frame[5:]  # the common single-line frame
+    else:
+        data = b"\n".join(line[5:] for line in frame.split(b"\n") if line.startswith(b"data:"))
+    return None if not data or data.isspace() else data
+
 
 class RpcError(Exception):
     """Raised when the Application returns a JSON-RPC error."""
@@ -45,6 +62,9 @@ class EngineClient:
         Default request timeout in seconds.
     max_retries : int
         Max connection-level retries.
+    transport : httpx.AsyncBaseTransport | None
+        Custom transport, e.g. ``httpx.ASGITransport`` to drive an
+        in-process app. Defaults to httpx's pooled network transport.
     """
 
     def __init__(
@@ -52,12 +72,16 @@ class EngineClient:
         base_url: str = "http://127.0.0.1:8100",
         timeout: float = 30.0,
         max_retries: int = 3,
+        transport: httpx.AsyncBaseTransport | None = None,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.max_retries = max_retries
         self._client = httpx.AsyncClient(
             base_url=self.base_url,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
             timeout=httpx.Timeout(timeout),
+            transport=transport,
         )
 
     # -- Lifecycle -----------------------------------------------------
@@ -71,16 +95,6 @@ class EngineClient:
     async def __aexit__(self, *exc: Any) -> None:
         await self.close()
 
-    # -- Internal retry helper -----------------------------------------
-
-    def _get_retrier(self) -> AsyncRetrying:
-        return AsyncRetrying(
-            stop=stop_after_attempt(self.max_retries),
-            wait=wait_exponential(multiplier=0.5, max=10),
-            retry=retry_if_exception_type((httpx.NetworkError, httpx.TimeoutException)),
-            reraise=True,
-        )
-
     # -- Unary RPC -----------------------------------------------------
 
     async def call(self, method: str, params: dict[str, Any] | None = None) -> Any:
@@ -89,16 +103,23 @@ class EngineClient:
         Raises ``RpcError`` if the Application returns a JSON-RPC error.
         """
         req = JsonRpcRequest(method=method, params=params or {})
-        payload = req.to_dict()
+        payload = dumps(req.to_dict())
 
         log.debug("rpc → %s(id=%s)", method, req.id)
 
-        async for attempt in self._get_retrier():
-            with attempt:
-                resp = await self._client.post("/rpc", json=payload)
-                resp.raise_for_status()
-
-        data = resp.json()
+        delay = _RETRY_BASE_DELAY
+        for attempt in range(1, max(self.max_retries, 1) + 1):
+            try:
+                resp = await self._client.post("/rpc", content=payload, headers=_JSON_HEADERS)
+                break
+            except _RETRY_ON:
+                if attempt >= self.max_retries:
+                    raise
+                await anyio.sleep(min(delay, _RETRY_MAX_DELAY))
+                delay *= 2
+        resp.raise_for_status()
+
+        data = loads(resp.content)
         if "error" in data and data["error"] is not None:
             err = JsonRpcError(**data["error"])
             raise RpcError(err)
@@ -114,31 +135,59 @@ class EngineClient:
     ) -> AsyncIterator[dict[str, Any]]:
         """Send a streaming JSON-RPC request and yield SSE events.
 
-        Each yielded dict is a parsed SSE ``data:`` line.
+        Each yielded dict is the parsed ``data`` payload of one SSE event;
+        comment frames (keep-alives) and blank ``data`` frames are skipped.
         """
         req = JsonRpcRequest(method=method, params=params or {})
-        payload = req.to_dict()
+        payload = dumps(req.to_dict())
 
         log.debug("rpc stream → %s(id=%s)", method, req.id)
 
         # We retry the initial connection establishment
-        async for attempt in self._get_retrier():
-            with attempt:
-                resp_cm = self._client.stream("POST", "/rpc", json=payload)
+        delay = _RETRY_BASE_DELAY
+        for attempt in range(1, max(self.max_retries, 1) + 1):
+            resp_cm = self._client.stream("POST", "/rpc", content=payload, headers=_JSON_HEADERS)
+            try:
                 resp = await resp_cm.__aenter__()
-                resp.raise_for_status()
+                break
+            except _RETRY_ON:
+                if attempt >= self.max_retries:
+                    raise
+                await anyio.sleep(min(delay, _RETRY_MAX_DELAY))
+                delay *= 2
 
         try:
-            async for line in resp.aiter_lines():
-                line = line.strip()
-                if not line.startswith("data:"):
-                    continue
-                raw = line[len("data:") :].strip()
-                try:
-                    event = json.loads(raw)
+            resp.raise_for_status()
+            # Split whole events on the blank line, in bytes — no line
+            # buffering or str decoding.  Only the newly arrived tail is
+            # searched, so an event spread over many chunks stays linear.
+            buf = bytearray()
+            cr = b""  # a chunk-final "\r", held until we see what follows it
+            async for chunk in resp.aiter_bytes():
+                if cr:
+                    chunk, cr = cr + chunk, b""
+                if b"\r" in chunk:
+                    if chunk.endswith(b"\r"):
+                        chunk, cr = chunk[:-1], b"\r"
+                    chunk = chunk.replace(b"\r\n", b"\n")
+                scan = max(len(buf) - 1, 0)  # a "\n\n" may straddle the seam
+                buf += chunk
+                start = 0
+                end = buf.find(b"\n\n", scan)
+                while end >= 0:
+                    frame = bytes(buf[start:end])
+                    start = end + 2
+                    end = buf.find(b"\n\n", start)
+                    data = _sse_data(frame)
+                    if data is None:
+                        continue
+                    try:
+                        event = loads(data)  # leading space is JSON whitespace
+                    except ValueError:
+                        log.warning("bad SSE frame: %r", frame)
+                        continue
                     yield event
-                except json.JSONDecodeError:
-                    log.warning("bad SSE line: %r", line)
+                del buf[:start]
         finally:
             await resp_cm.__aexit__(None, None, None)
 
@@ -177,6 +226,4 @@ async def _demo() -> None:
 
 
 if __name__ == "__main__":
-    import anyio
-
     anyio.run(_demo)
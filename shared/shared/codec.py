@@ -0,0 +1,49 @@
+"""JSON encoding helpers used on both sides of the wire.
+
+Both compartments exchange integers wider than 64 bits as plain JSON
+numbers, so neither side may lose or reject them:
+
+* ``dumps`` uses ``orjson`` and falls back to the stdlib for what orjson
+  refuses (integers wider than 64 bits).
+* ``loads`` uses ``msgspec``, which keeps wide integers exact — orjson
+  silently turns them into floats, with no error to fall back on.
+
+Either library is optional; without it the stdlib ``json`` is used.
+``shared`` itself still has no dependencies.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # type: ignore[assignment]
+
+
+def _std_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode *obj* as compact JSON bytes."""
+    if orjson is None:
+        return _std_dumps(obj)
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        return _std_dumps(obj)
+
+
+def loads(data: bytes | bytearray | str) -> Any:
+    """Decode JSON, keeping integers exact.  Raises ``ValueError`` on bad input."""
+    if msgspec is None:
+        return json.loads(data)
+    return msgspec.json.decode(data)
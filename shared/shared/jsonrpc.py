@@ -6,8 +6,8 @@ import these for serialisation only.
 
 from __future__ import annotations
 
-import uuid
-from dataclasses import asdict, dataclass, field
+import itertools
+from dataclasses import dataclass, field
 from typing import Any
 
 # ── Standard error codes (JSON-RPC 2.0 §5.1) ────────────────────────
@@ -18,6 +18,19 @@ INVALID_PARAMS = -32602
 INTERNAL_ERROR = -32603
 
 
+# Ids only need to be unique per process/connection, so a counter does;
+# no RNG call on the request path.
+_id_counter = itertools.count(1)
+
+
+def new_request_id() -> str:
+    """Next auto-generated request id (``"1"``, ``"2"``, ...).
+
+    Used for requests built without an id, on either side of the wire.
+    """
+    return str(next(_id_counter))
+
+
 # ── Models ───────────────────────────────────────────────────────────
 @dataclass(slots=True)
 class JsonRpcError:
@@ -44,12 +57,18 @@ class JsonRpcRequest:
 
     method: str
     params: dict[str, Any] = field(default_factory=dict)
-    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    id: str = field(default_factory=new_request_id)
     jsonrpc: str = "2.0"
 
     # -- Convenience ---------------------------------------------------
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        # Built by hand: ``dataclasses.asdict`` deep-copies every field.
+        return {
+            "jsonrpc": self.jsonrpc,
+            "method": self.method,
+            "params": self.params,
+            "id": self.id,
+        }
 
     @classmethod
     def from_dict(cls, raw: dict[str, Any]) -> "JsonRpcRequest":
@@ -61,13 +80,17 @@ class JsonRpcRequest:
         method = raw.get("method")
         if not isinstance(method, str) or not method:
             raise ValueError("missing or invalid 'method' field")
-        params = raw.get("params", {})
-        if not isinstance(params, dict):
+        params = raw.get("params")
+        if params is None and "params" not in raw:
+            params = {}
+        elif not isinstance(params, dict):
             raise ValueError("'params' must be a JSON object")
         req_id = raw.get("id")
         if req_id is None:
-            req_id = uuid.uuid4().hex
-        return cls(method=method, params=params, id=str(req_id))
+            req_id = new_request_id()
+        elif not isinstance(req_id, str):
+            req_id = str(req_id)
+        return cls(method, params, req_id)
 
 
 @dataclass(slots=True)
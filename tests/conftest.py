@@ -1,8 +1,27 @@
 """Pytest configuration and shared fixtures."""
 
+import httpx
 import pytest
+import pytest_asyncio
+from app.server import app
+from engine.client import EngineClient
 
 
-@pytest.fixture
-def anyio_backend():
-    return "asyncio"
+@pytest.fixture(scope="session")
+def transport():
+    """In-process ASGI transport, shared by the whole session."""
+    return httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client(transport):
+    """In-process async test client, shared by the whole session."""
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as shared:
+        yield shared
+
+
+@pytest_asyncio.fixture(scope="session")
+async def engine(transport):
+    """EngineClient wired to the in-process ASGI app, shared by the whole session."""
+    async with EngineClient(base_url="http://test", transport=transport) as shared:
+        yield shared
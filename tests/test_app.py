@@ -1,101 +1,378 @@
 """Tests for the Application compartment /rpc endpoint.
 
-Uses ``httpx.ASGITransport`` to test Starlette in-process without
-starting a real server.
+Uses ``httpx.ASGITransport`` to test the ASGI app in-process without
+starting a real server. Error paths only check the encoded body, so they
+call ``rpc_endpoint`` directly and skip the HTTP layer.
 """
 
-import httpx
+import json
+from collections import Counter
+
+import anyio
+import orjson
 import pytest
-from app.server import app
+from app.dispatcher import Registry
+from app.server import MAX_BODY_SIZE, _sse_frame, _sse_generator, rpc_app, rpc_endpoint
+from app.streaming import MemoryChannelPool, StreamContext, StreamManager
+from shared.jsonrpc import PARSE_ERROR, JsonRpcResponse
+
+_JSON_HEADERS = {"content-type": "application/json"}
 
+ECHO_REQ = {"jsonrpc": "2.0", "method": "echo", "params": {"msg": "hi"}, "id": "1"}
+ADD_REQ = {"jsonrpc": "2.0", "method": "add", "params": {"a": 3, "b": 4}, "id": "2"}
+NOT_FOUND_REQ = {"jsonrpc": "2.0", "method": "nonexistent", "params": {}, "id": "3"}
+INVALID_REQ = {"jsonrpc": "1.0", "method": "echo"}
+NULL_PARAMS_REQ = {"jsonrpc": "2.0", "method": "echo", "params": None, "id": "4"}
+GENERATE_REQ = {
+    "jsonrpc": "2.0",
+    "method": "generate",
+    "params": {"tokens": 3, "delay": 0},
+    "id": "s1",
+}
 
-@pytest.fixture
-def client():
-    """In-process async test client."""
-    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
-    return httpx.AsyncClient(transport=transport, base_url="http://test")
+# Serialised once so each POST skips httpx's per-call json encoding.
+ECHO_BODY = orjson.dumps(ECHO_REQ)
+ADD_BODY = orjson.dumps(ADD_REQ)
+NOT_FOUND_BODY = orjson.dumps(NOT_FOUND_REQ)
+INVALID_BODY = orjson.dumps(INVALID_REQ)
+NULL_PARAMS_BODY = orjson.dumps(NULL_PARAMS_REQ)
+GENERATE_BODY = orjson.dumps(GENERATE_REQ)
 
 
 # ── Unary tests ──────────────────────────────────────────────────────
 
 
-@pytest.mark.anyio
-async def test_echo(client):
-    resp = await client.post(
-        "/rpc", json={"jsonrpc": "2.0", "method": "echo", "params": {"msg": "hi"}, "id": "1"}
-    )
+@pytest.mark.parametrize(
+    ("body", "req_id", "result"),
+    [
+        (ECHO_BODY, ECHO_REQ["id"], {"msg": "hi"}),
+        (ADD_BODY, ADD_REQ["id"], {"result": 7}),
+    ],
+    ids=["echo", "add"],
+)
+async def test_rpc_result(client, body, req_id, result):
+    resp = await client.post("/rpc", content=body, headers=_JSON_HEADERS)
     assert resp.status_code == 200
-    data = resp.json()
-    assert data["result"] == {"msg": "hi"}
-    assert data["id"] == "1"
+    data = orjson.loads(resp.content)
+    assert data["result"] == result
+    assert data["id"] == req_id
 
 
-@pytest.mark.anyio
-async def test_add(client):
-    resp = await client.post(
-        "/rpc", json={"jsonrpc": "2.0", "method": "add", "params": {"a": 3, "b": 4}, "id": "2"}
-    )
-    data = resp.json()
-    assert data["result"] == {"result": 7}
+@pytest.mark.parametrize(
+    ("body", "code"),
+    [
+        (NOT_FOUND_BODY, -32601),  # METHOD_NOT_FOUND
+        (INVALID_BODY, -32600),  # INVALID_REQUEST
+        (NULL_PARAMS_BODY, -32600),  # INVALID_REQUEST, as in JsonRpcRequest.from_dict
+    ],
+    ids=["method_not_found", "invalid_request", "null_params"],
+)
+async def test_rpc_error(body, code):
+    data = orjson.loads(await rpc_endpoint(body))
+    assert data["error"]["code"] == code
 
 
-@pytest.mark.anyio
-async def test_method_not_found(client):
-    resp = await client.post(
-        "/rpc", json={"jsonrpc": "2.0", "method": "nonexistent", "params": {}, "id": "3"}
-    )
-    data = resp.json()
-    assert data["error"]["code"] == -32601  # METHOD_NOT_FOUND
+async def test_missing_id_gets_generated_id():
+    body = orjson.dumps({"jsonrpc": "2.0", "method": "echo", "params": {}})
+    first = orjson.loads(await rpc_endpoint(body))["id"]
+    second = orjson.loads(await rpc_endpoint(body))["id"]
+    assert first.isdigit() and second.isdigit()
+    assert first != second
 
 
-@pytest.mark.anyio
-async def test_parse_error(client):
-    resp = await client.post(
-        "/rpc",
-        content=b"not json",
-        headers={"content-type": "application/json"},
-    )
-    data = resp.json()
-    assert data["error"]["code"] == -32700  # PARSE_ERROR
+async def test_wide_integers_survive_encoding():
+    """orjson rejects ints over 64 bits; the server must still answer."""
+    body = b'{"jsonrpc":"2.0","method":"add","params":{"a":%d,"b":1}}' % 2**64
+    assert json.loads(await rpc_endpoint(body))["result"] == {"result": 2**64 + 1}
 
 
-@pytest.mark.anyio
-async def test_invalid_request(client):
-    resp = await client.post("/rpc", json={"jsonrpc": "1.0", "method": "echo"})
-    data = resp.json()
-    assert data["error"]["code"] == -32600  # INVALID_REQUEST
+async def test_wide_integer_in_stream_event(client):
+    body = b'{"jsonrpc":"2.0","method":"generate","params":{"prompt":%d,"tokens":2,"delay":0}}'
+    resp = await client.post("/rpc", content=body % 2**64, headers=_JSON_HEADERS)
+    frames = [f for f in resp.content.split(b"\n\n") if f.startswith(b"data: ")]
+    events = [json.loads(f[6:]) for f in frames]
+    assert [e["type"] for e in events] == ["stream_start", "token", "token", "done", "stream_end"]
+    assert events[1]["prompt"] == 2**64
+
+
+def test_unencodable_stream_event_becomes_error_frame():
+    frame = _sse_frame({"type": "token", "token": {1, 2}})
+    assert frame.startswith(b'data: {"error":"unencodable event')
+    assert frame.endswith(b"\n\n")
+
+
+async def test_parse_error():
+    data = orjson.loads(await rpc_endpoint(b"not json"))
+    assert data["error"]["code"] == PARSE_ERROR
+    # The server sends a precomputed body; it must match the model's shape.
+    assert data == JsonRpcResponse.fail(None, PARSE_ERROR, "Parse error").to_dict()
 
 
 # ── Streaming tests ──────────────────────────────────────────────────
 
 
-@pytest.mark.anyio
 async def test_streaming_generate(client):
     """Streaming response returns SSE events."""
-    async with client.stream(
-        "POST",
-        "/rpc",
-        json={
-            "jsonrpc": "2.0",
-            "method": "generate",
-            "params": {"tokens": 3, "delay": 0.05},
-            "id": "s1",
-        },
-    ) as resp:
+    req = client.build_request("POST", "/rpc", content=GENERATE_BODY, headers=_JSON_HEADERS)
+    resp = await client.send(req, stream=True)
+    try:
         assert resp.status_code == 200
         assert "text/event-stream" in resp.headers["content-type"]
 
         events = []
-        async for line in resp.aiter_lines():
-            line = line.strip()
-            if line.startswith("data:"):
-                import json
-
-                events.append(json.loads(line[5:].strip()))
+        buf = b""
+        async for chunk in resp.aiter_bytes():
+            buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                if line.startswith(b"data:"):
+                    payload = line[5:].strip()
+                    if not payload:
+                        continue
+                    events.append(orjson.loads(payload))
+    finally:
+        await resp.aclose()
 
     # Expect: stream_start, 3 tokens, done, stream_end
-    types = [e.get("type") for e in events]
-    assert types[0] == "stream_start"
-    assert types[-1] == "stream_end"
-    token_events = [e for e in events if e.get("type") == "token"]
-    assert len(token_events) == 3
+    counts = Counter(e.get("type") for e in events)
+    assert events[0]["type"] == "stream_start"
+    assert events[-1]["type"] == "stream_end"
+    assert counts["token"] == 3
+
+
+# ── StreamManager tests ──────────────────────────────────────────────
+
+
+async def _block_until_cancelled(params: dict, ctx: StreamContext) -> None:
+    params["started"].set()
+    await anyio.sleep_forever()
+
+
+async def test_cancel_stream_requires_exact_id():
+    mgr = StreamManager()
+    started = anyio.Event()
+    batches = []
+
+    async def consume() -> None:
+        params = {"started": started}
+        async for batch in mgr.run_stream(_block_until_cancelled, params, "abcd"):
+            batches.append(batch)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(consume)
+        await started.wait()
+        for other in ("ABCD", "0xabcd", " abcd", 123, None):
+            assert mgr.cancel_stream(other) is False  # type: ignore[arg-type]
+        assert mgr.active_streams == ["abcd"]
+        assert mgr.cancel_stream("abcd") is True
+
+    assert mgr.active_streams == []
+    assert batches == []
+
+
+async def _emit_tokens(params: dict, ctx: StreamContext) -> None:
+    for i in range(params["tokens"]):
+        await ctx.emit({"type": "token", "index": i})
+
+
+async def test_stalled_consumer_does_not_pin_stream():
+    """End-of-stream is delivered even if the consumer stops reading."""
+    mgr = StreamManager(buffer_size=1, pool_size=1, send_timeout=0.02)
+    batches = mgr.run_stream(_emit_tokens, {"tokens": 5})
+    first = await batches.__anext__()
+    await anyio.sleep(0.15)  # stall well past both send timeouts
+
+    # The backlog was dropped to make room for the end-of-stream marker.
+    assert [batch async for batch in batches] == []
+    assert 0 < len(first) < 5
+    assert mgr.active_streams == []
+    assert mgr._channels.idle == 1
+
+
+def test_zero_buffer_rejected():
+    # End-of-stream must fit in the buffer once a stalled backlog is dropped.
+    with pytest.raises(ValueError, match="buffer_size"):
+        StreamManager(buffer_size=0)
+    with pytest.raises(ValueError, match="buffer_size"):
+        MemoryChannelPool(buffer_size=0, size=1)
+
+
+async def test_emit_timeout_cancels_handler():
+    seen = {}
+
+    async def handler(params: dict, ctx: StreamContext) -> None:
+        for i in range(100):
+            await ctx.emit({"type": "token", "index": i})
+        seen["cancelled"] = ctx.cancelled
+
+    mgr = StreamManager(buffer_size=1, pool_size=1, send_timeout=0.02)
+    batches = mgr.run_stream(handler, {})
+    await batches.__anext__()
+    await anyio.sleep(0.1)  # stop reading; the next emit times out
+
+    assert seen == {"cancelled": True}
+    assert mgr.active_streams == []
+    assert [batch async for batch in batches] == []
+
+
+async def test_idle_stream_yields_empty_batch():
+    async def handler(params: dict, ctx: StreamContext) -> None:
+        await anyio.sleep(0.05)
+        await ctx.emit({"type": "token"})
+
+    mgr = StreamManager(keepalive=0.01)
+    batches = [batch async for batch in mgr.run_stream(handler, {})]
+    assert batches[0] == []
+    assert batches[-1] == [{"type": "token"}]
+
+
+async def test_idle_sse_stream_sends_keepalive(client, monkeypatch):
+    monkeypatch.setattr("app.server.stream_manager", StreamManager(keepalive=0.01))
+    body = orjson.dumps(
+        {"jsonrpc": "2.0", "method": "generate", "params": {"tokens": 1, "delay": 0.05}}
+    )
+    resp = await client.post("/rpc", content=body, headers=_JSON_HEADERS)
+    assert b": keep-alive\n\n" in resp.content
+    assert b'"type":"token"' in resp.content
+
+
+async def test_batches_respect_max_batch():
+    mgr = StreamManager(max_batch=2)
+    batches = [batch async for batch in mgr.run_stream(_emit_tokens, {"tokens": 5})]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [e["index"] for batch in batches for e in batch] == [0, 1, 2, 3, 4]
+
+
+async def test_end_of_stream_in_same_batch_as_events():
+    mgr = StreamManager()
+    batches = [batch async for batch in mgr.run_stream(_emit_tokens, {"tokens": 5})]
+    # Everything, marker included, was queued before the first read.
+    assert batches == [[{"type": "token", "index": i} for i in range(5)]]
+
+
+async def test_sse_batches_flush_at_chunk_size():
+    params = {"prompt": "x" * 6000, "tokens": 5, "delay": 0}
+    parts = [part async for part in _sse_generator("generate", params, "ab")]
+    # start | 3 tokens (>= 16 KiB) | 2 tokens + done | end
+    assert [part.count(b"data: ") for part in parts] == [1, 3, 3, 1]
+
+
+async def test_cancelled_stream_returns_channel_to_pool():
+    mgr = StreamManager(pool_size=1)
+    started = anyio.Event()
+
+    async def consume() -> None:
+        params = {"started": started}
+        async for _ in mgr.run_stream(_block_until_cancelled, params, "abcd"):
+            pass
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(consume)
+        await started.wait()
+        assert mgr._channels.idle == 0
+        assert mgr.cancel_stream("abcd") is True
+
+    assert mgr.active_streams == []
+    assert mgr._channels.idle == 1
+
+
+def test_channel_pool_drains_on_release():
+    pool = MemoryChannelPool(buffer_size=4, size=1)
+    send, recv = pool.acquire()
+    send.send_nowait("left")
+    send.send_nowait("over")
+    pool.release(send, recv)
+
+    assert pool.acquire() == (send, recv)
+    assert recv.statistics().current_buffer_used == 0
+
+
+async def test_cancel_rpc_with_non_string_id():
+    body = orjson.dumps(
+        {"jsonrpc": "2.0", "method": "engine.stream.cancel", "params": {"stream_id": 123}}
+    )
+    data = orjson.loads(await rpc_endpoint(body))
+    assert data["result"] == {"cancelled": False, "stream_id": 123}
+
+
+# ── HTTP layer tests ─────────────────────────────────────────────────
+
+
+async def test_unknown_path_is_404(client):
+    resp = await client.post("/other", content=ECHO_BODY, headers=_JSON_HEADERS)
+    assert resp.status_code == 404
+
+
+async def test_non_post_is_405(client):
+    resp = await client.get("/rpc")
+    assert resp.status_code == 405
+    assert resp.headers["allow"] == "POST"
+
+
+async def test_oversized_body_is_413(client):
+    body = b" " * (MAX_BODY_SIZE + 1)
+    resp = await client.post("/rpc", content=body, headers=_JSON_HEADERS)
+    assert resp.status_code == 413
+
+
+async def test_multi_chunk_body_under_cap(client):
+    async def chunks():
+        for i in range(0, len(ECHO_BODY), 8):
+            yield ECHO_BODY[i : i + 8]
+
+    resp = await client.post("/rpc", content=chunks(), headers=_JSON_HEADERS)
+    assert resp.status_code == 200
+    assert orjson.loads(resp.content)["result"] == ECHO_REQ["params"]
+
+
+async def test_lifespan_handshake():
+    incoming = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    await rpc_app({"type": "lifespan"}, receive, send)
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+
+async def test_disconnect_mid_body_is_not_dispatched():
+    incoming = [
+        {"type": "http.request", "body": ECHO_BODY[:10], "more_body": True},
+        {"type": "http.disconnect"},
+    ]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await rpc_app({"type": "http", "path": "/rpc", "method": "POST"}, receive, send)
+    assert sent == []
+
+
+# ── Registry tests ───────────────────────────────────────────────────
+
+
+async def test_registry_rejects_registration_once_frozen():
+    reg = Registry()
+
+    @reg.handler("echo")
+    async def echo(params: dict) -> dict:
+        return params
+
+    reg.freeze()
+    assert reg.frozen
+    with pytest.raises(RuntimeError, match="frozen"):
+
+        @reg.handler("late")
+        async def late(params: dict) -> dict:
+            return params
+
+    assert not reg.is_registered("late")
+    assert await reg.dispatch("echo", {"x": 1}) == {"x": 1}
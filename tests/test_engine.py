@@ -1,60 +1,110 @@
 """Tests for the Engine client.
 
-Tests use ``httpx.ASGITransport`` pointed at the real Starlette app
+Tests use ``httpx.ASGITransport`` pointed at the real ASGI app
 so we get a genuine HTTP-level integration without starting a server.
+SSE parsing edge cases use ``httpx.MockTransport`` with canned bodies.
 """
 
+from collections import Counter
+
 import httpx
 import pytest
-from app.server import app
 from engine.client import EngineClient, RpcError
 
 
-@pytest.fixture
-async def engine():
-    """EngineClient wired to the in-process Starlette app."""
-    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
-    client = EngineClient.__new__(EngineClient)
-    client.base_url = "http://test"
-    client.max_retries = 3
-    client._client = httpx.AsyncClient(transport=transport, base_url="http://test")
-    yield client
-    await client.close()
+@pytest.mark.parametrize(
+    ("method", "params", "result"),
+    [
+        ("echo", {"msg": "hello"}, {"msg": "hello"}),
+        ("add", {"a": 10, "b": 20}, {"result": 30}),
+    ],
+    ids=["echo", "add"],
+)
+async def test_call(engine, method, params, result):
+    assert await engine.call(method, params) == result
 
 
-@pytest.mark.anyio
-async def test_call_echo(engine):
-    result = await engine.call("echo", {"msg": "hello"})
-    assert result == {"msg": "hello"}
+@pytest.mark.parametrize(
+    ("a", "b"),
+    [(2**64, 1), (2**63, 2**63)],
+    ids=["wide_operand", "wide_result"],
+)
+async def test_call_keeps_wide_integers_exact(engine, a, b):
+    result = await engine.call("add", {"a": a, "b": b})
+    assert result == {"result": a + b}
+    assert isinstance(result["result"], int)
 
 
-@pytest.mark.anyio
-async def test_call_add(engine):
-    result = await engine.call("add", {"a": 10, "b": 20})
-    assert result == {"result": 30}
+async def test_stream_keeps_wide_integers_exact(engine):
+    params = {"prompt": 2**64, "tokens": 2, "delay": 0}
+    tokens = [e async for e in engine.stream("generate", params) if e.get("type") == "token"]
+    assert [e["prompt"] for e in tokens] == [2**64, 2**64]
 
 
-@pytest.mark.anyio
 async def test_call_method_not_found(engine):
     with pytest.raises(RpcError) as exc_info:
         await engine.call("does_not_exist")
     assert exc_info.value.error.code == -32601
 
 
-@pytest.mark.anyio
 async def test_stream_generate(engine):
     events = []
-    async for event in engine.stream("generate", {"tokens": 3, "delay": 0.05}):
+    async for event in engine.stream("generate", {"tokens": 3, "delay": 0}):
         events.append(event)
 
-    types = [e.get("type") for e in events]
-    assert "stream_start" in types
-    assert "stream_end" in types
-    tokens = [e for e in events if e.get("type") == "token"]
-    assert len(tokens) == 3
+    counts = Counter(e.get("type") for e in events)
+    assert counts["stream_start"] == 1
+    assert counts["stream_end"] == 1
+    assert counts["token"] == 3
 
 
-@pytest.mark.anyio
 async def test_cancel_nonexistent_stream(engine):
     result = await engine.cancel_stream("nonexistent_id")
     assert result["cancelled"] is False
+
+
+# ── SSE parsing (canned responses) ───────────────────────────────────
+
+
+def _sse_engine(*chunks: bytes) -> EngineClient:
+    """EngineClient whose every request gets *chunks* back as an SSE body."""
+
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body(), headers={"content-type": "text/event-stream"})
+
+    return EngineClient(base_url="http://test", transport=httpx.MockTransport(respond))
+
+
+_FRAMES = b'data: {"a":1}\n\ndata: {"a":2}\n\n'
+
+
+@pytest.mark.parametrize(
+    ("chunks", "events"),
+    [
+        (
+            [
+                b'data: {"type":"stream_start"}\n\n',
+                b"data:\n\n",
+                b"data: \n\n",
+                b": keep-alive\n\n",
+                b'data: {"type":"stream_end"}\n\n',
+            ],
+            [{"type": "stream_start"}, {"type": "stream_end"}],
+        ),
+        (
+            [b'data: {"a":1}\r', b"\n\r\n", b'data: {"a":2}\r\n\r', b"\n"],
+            [{"a": 1}, {"a": 2}],
+        ),
+        ([b'data: {"a":\ndata: 1}\n\n'], [{"a": 1}]),
+        ([_FRAMES[i : i + 1] for i in range(len(_FRAMES))], [{"a": 1}, {"a": 2}]),
+        ([b'data: {"a":1}\n', b'\ndata: {"a":2}\n\n'], [{"a": 1}, {"a": 2}]),
+    ],
+    ids=["blank_data", "crlf", "multiline_data", "byte_chunks", "split_separator"],
+)
+async def test_stream_parses_sse(chunks, events):
+    async with _sse_engine(*chunks) as engine:
+        assert [event async for event in engine.stream("generate")] == events
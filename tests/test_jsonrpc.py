@@ -12,10 +12,15 @@ from shared.jsonrpc import (
 )
 
 
+@pytest.fixture(scope="class")
+def sample_req():
+    """Read-only request built once per test class; do not mutate it."""
+    return JsonRpcRequest(method="echo", params={"a": 1}, id="abc")
+
+
 class TestJsonRpcRequest:
-    def test_to_dict(self):
-        req = JsonRpcRequest(method="echo", params={"a": 1}, id="abc")
-        d = req.to_dict()
+    def test_to_dict(self, sample_req):
+        d = sample_req.to_dict()
         assert d["jsonrpc"] == "2.0"
         assert d["method"] == "echo"
         assert d["params"] == {"a": 1}
@@ -34,6 +39,19 @@ class TestJsonRpcRequest:
         assert req.method == "test"
         assert req.id  # auto-generated, non-empty
 
+    def test_auto_ids_are_unique(self):
+        ids = {JsonRpcRequest(method="t").id for _ in range(1000)}
+        assert len(ids) == 1000
+
+    def test_from_dict_coerces_id(self):
+        req = JsonRpcRequest.from_dict({"jsonrpc": "2.0", "method": "test", "id": 7})
+        assert req.params == {}
+        assert req.id == "7"
+
+    def test_from_dict_null_params(self):
+        with pytest.raises(ValueError, match="params"):
+            JsonRpcRequest.from_dict({"jsonrpc": "2.0", "method": "t", "params": None})
+
     def test_from_dict_missing_jsonrpc(self):
         with pytest.raises(ValueError, match="jsonrpc"):
             JsonRpcRequest.from_dict({"method": "test"})
@@ -92,3 +110,17 @@ class TestErrorCodes:
         assert INVALID_REQUEST == -32600
         assert METHOD_NOT_FOUND == -32601
         assert INTERNAL_ERROR == -32603
+
+
+class TestLayout:
+    @pytest.mark.parametrize(
+        "obj",
+        [
+            JsonRpcRequest(method="echo"),
+            JsonRpcResponse.success("1", None),
+            JsonRpcError(code=INTERNAL_ERROR, message="oops"),
+        ],
+        ids=["request", "response", "error"],
+    )
+    def test_models_are_slotted(self, obj):
+        assert not hasattr(obj, "__dict__")